@@ -9,19 +9,24 @@ from fastapi import (
 )
 from fastapi.middleware.cors import CORSMiddleware
 import requests
-import os, shutil, logging, re
+import os, shutil, logging, re, threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 
 from pathlib import Path
-from typing import List, Union, Sequence, Iterator, Any
+from typing import List, Union, Sequence, Iterator, Any, Callable
 
 from chromadb.utils.batch_utils import create_batches
 from langchain_core.documents import Document
+from langchain_core.document_loaders import BaseLoader
 
 from langchain_community.document_loaders import (
     WebBaseLoader,
     TextLoader,
     PyPDFLoader,
+    PyPDFium2Loader,
     CSVLoader,
     BSHTMLLoader,
     Docx2txtLoader,
@@ -47,6 +52,7 @@ from typing import Optional
 import mimetypes
 import uuid
 import json
+import pickle
 
 import sentence_transformers
 
@@ -124,6 +130,9 @@ from config import (
     RAG_WEB_SEARCH_RESULT_COUNT,
     RAG_WEB_SEARCH_CONCURRENT_REQUESTS,
     RAG_EMBEDDING_OPENAI_BATCH_SIZE,
+    RAG_LOAD_MAX_WORKERS,
+    RAG_DOCUMENT_CACHE_DIR,
+    RAG_DOCUMENT_CACHE_MAX_ENTRIES,
 )
 
 from constants import ERROR_MESSAGES
@@ -897,7 +906,7 @@ def store_data_in_vector_db(data, collection_name, overwrite: bool = False) -> b
     docs = text_splitter.split_documents(data)
 
     if len(docs) > 0:
-        log.info(f"store_data_in_vector_db {docs}")
+        log.info(f"store_data_in_vector_db {len(docs)} chunks")
         return store_docs_in_vector_db(docs, collection_name, overwrite), None
     else:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
@@ -916,7 +925,7 @@ def store_text_in_vector_db(
 
 
 def store_docs_in_vector_db(docs, collection_name, overwrite: bool = False) -> bool:
-    log.info(f"store_docs_in_vector_db {docs} {collection_name}")
+    log.info(f"store_docs_in_vector_db {len(docs)} chunks {collection_name}")
 
     texts = [doc.page_content for doc in docs]
     metadatas = [doc.metadata for doc in docs]
@@ -967,11 +976,8 @@ def store_docs_in_vector_db(docs, collection_name, overwrite: bool = False) -> b
         return False
 
 
-def get_loader(filename: str, file_content_type: str, file_path: str):
-    file_ext = filename.split(".")[-1].lower()
-    known_type = True
-
-    known_source_ext = [
+KNOWN_SOURCE_EXT = frozenset(
+    {
         "go",
         "py",
         "java",
@@ -1015,51 +1021,165 @@ def get_loader(filename: str, file_content_type: str, file_path: str):
         "vue",
         "svelte",
         "msg",
-    ]
+    }
+)
 
-    if file_ext == "pdf":
-        loader = PyPDFLoader(
-            file_path, extract_images=app.state.config.PDF_EXTRACT_IMAGES
-        )
-    elif file_ext == "csv":
-        loader = CSVLoader(file_path)
-    elif file_ext == "rst":
-        loader = UnstructuredRSTLoader(file_path, mode="elements")
-    elif file_ext == "xml":
-        loader = UnstructuredXMLLoader(file_path)
-    elif file_ext in ["htm", "html"]:
-        loader = BSHTMLLoader(file_path, open_encoding="unicode_escape")
-    elif file_ext == "md":
-        loader = UnstructuredMarkdownLoader(file_path)
-    elif file_content_type == "application/epub+zip":
-        loader = UnstructuredEPubLoader(file_path)
-    elif (
-        file_content_type
-        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        or file_ext in ["doc", "docx"]
-    ):
-        loader = Docx2txtLoader(file_path)
-    elif file_content_type in [
-        "application/vnd.ms-excel",
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    ] or file_ext in ["xls", "xlsx"]:
-        loader = UnstructuredExcelLoader(file_path)
-    elif file_content_type in [
-        "application/vnd.ms-powerpoint",
-        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    ] or file_ext in ["ppt", "pptx"]:
-        loader = UnstructuredPowerPointLoader(file_path)
-    elif file_ext == "msg":
-        loader = OutlookMessageLoader(file_path)
-    elif file_ext in known_source_ext or (
+
+# PDFium is not thread-safe, and uploads and docs dir scans load files concurrently
+PDFIUM_LOCK = threading.Lock()
+
+
+class SafePyPDFium2Loader(PyPDFium2Loader):
+    """PyPDFium2Loader that serializes PDFium calls and normalizes line breaks."""
+
+    def lazy_load(self) -> Iterator[Document]:
+        # The whole document is parsed, and closed, while holding the lock
+        with PDFIUM_LOCK:
+            docs = list(super().lazy_load())
+
+        for doc in docs:
+            # PDFium returns \r\n line breaks, pypdf and the other loaders use \n
+            doc.page_content = doc.page_content.replace("\r\n", "\n")
+            yield doc
+
+
+def get_pdf_loader(file_path: str) -> BaseLoader:
+    # pypdfium2 wraps the native PDFium library and extracts text much faster than
+    # the pure Python pypdf, which is kept for the OCR image extraction path
+    if app.state.config.PDF_EXTRACT_IMAGES:
+        return PyPDFLoader(file_path, extract_images=True)
+    return SafePyPDFium2Loader(file_path)
+
+
+def get_html_loader(file_path: str) -> BaseLoader:
+    return BSHTMLLoader(file_path, open_encoding="unicode_escape")
+
+
+def get_rst_loader(file_path: str) -> BaseLoader:
+    return UnstructuredRSTLoader(file_path, mode="elements")
+
+
+EXT_TO_LOADER: dict[str, Callable[[str], BaseLoader]] = {
+    "pdf": get_pdf_loader,
+    "csv": CSVLoader,
+    "rst": get_rst_loader,
+    "xml": UnstructuredXMLLoader,
+    "htm": get_html_loader,
+    "html": get_html_loader,
+    "md": UnstructuredMarkdownLoader,
+    "doc": Docx2txtLoader,
+    "docx": Docx2txtLoader,
+    "xls": UnstructuredExcelLoader,
+    "xlsx": UnstructuredExcelLoader,
+    "ppt": UnstructuredPowerPointLoader,
+    "pptx": UnstructuredPowerPointLoader,
+    "msg": OutlookMessageLoader,
+}
+
+MIME_TO_LOADER: dict[str, Callable[[str], BaseLoader]] = {
+    "application/epub+zip": UnstructuredEPubLoader,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": Docx2txtLoader,
+    "application/vnd.ms-excel": UnstructuredExcelLoader,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": UnstructuredExcelLoader,
+    "application/vnd.ms-powerpoint": UnstructuredPowerPointLoader,
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": UnstructuredPowerPointLoader,
+}
+
+
+def get_text_loader(file_path: str) -> BaseLoader:
+    return TextLoader(file_path, autodetect_encoding=True)
+
+
+@lru_cache(maxsize=128)
+def get_loader_factory(
+    file_ext: str, file_content_type: Optional[str]
+) -> tuple[Callable[[str], BaseLoader], bool]:
+    """Resolve the loader factory for a file type, and whether the type is known.
+
+    Only the factory is memoized; loaders are still created per file and read
+    their options from the app config when they are called.
+    """
+    factory = EXT_TO_LOADER.get(file_ext) or MIME_TO_LOADER.get(file_content_type)
+
+    if factory:
+        return factory, True
+    elif file_ext in KNOWN_SOURCE_EXT or (
         file_content_type and file_content_type.find("text/") >= 0
     ):
-        loader = TextLoader(file_path, autodetect_encoding=True)
+        return get_text_loader, True
     else:
-        loader = TextLoader(file_path, autodetect_encoding=True)
-        known_type = False
+        return get_text_loader, False
+
+
+def get_loader(filename: str, file_content_type: str, file_path: str):
+    # Dotless names such as "Dockerfile" and dotfiles such as ".env" keep using the
+    # bare name as their extension so they still match KNOWN_SOURCE_EXT
+    name, ext = os.path.splitext(filename)
+    file_ext = (ext or name).lstrip(".").lower()
+
+    factory, known_type = get_loader_factory(file_ext, file_content_type)
+    return factory(file_path), known_type
+
+
+def load_docs_with_cache(
+    loader: BaseLoader,
+    file_path: str,
+    file_content_type: Optional[str],
+    file_hash: Optional[str] = None,
+) -> List[Document]:
+    """Load documents from a file, reusing the parsed result of an identical earlier load.
+
+    Entries are keyed by the loader, its options, the file location and the sha256
+    of the file contents, and the least recently used entries are evicted once
+    RAG_DOCUMENT_CACHE_MAX_ENTRIES is exceeded. Setting it to 0 disables the cache.
+    """
+    if RAG_DOCUMENT_CACHE_MAX_ENTRIES <= 0:
+        return loader.load()
+
+    if file_hash == None:
+        f = open(file_path, "rb")
+        file_hash = calculate_sha256(f)
+        f.close()
+
+    key = calculate_sha256_string(
+        f"{type(loader).__name__}:{app.state.config.PDF_EXTRACT_IMAGES}:"
+        f"{file_content_type}:{file_path}:{file_hash}"
+    )
+    cache_path = Path(RAG_DOCUMENT_CACHE_DIR) / f"{key}.pkl"
+
+    if cache_path.is_file():
+        try:
+            with open(cache_path, "rb") as f:
+                docs = pickle.load(f)
+            cache_path.touch()
+            log.debug(f"document cache hit for {file_path}")
+            return docs
+        except Exception as e:
+            log.exception(e)
+
+    docs = loader.load()
 
-    return loader, known_type
+    try:
+        tmp_path = cache_path.with_suffix(f".{uuid.uuid4()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(docs, f)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        log.exception(e)
+
+    entries = []
+    for entry in Path(RAG_DOCUMENT_CACHE_DIR).glob("*.pkl"):
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except FileNotFoundError:
+            # Already evicted by a concurrent load
+            pass
+
+    entries.sort()
+    for _, entry in entries[: max(len(entries) - RAG_DOCUMENT_CACHE_MAX_ENTRIES, 0)]:
+        entry.unlink(missing_ok=True)
+
+    return docs
 
 
 @app.post("/doc")
@@ -1077,18 +1197,18 @@ def store_doc(
 
         file_path = f"{UPLOAD_DIR}/{filename}"
 
-        contents = file.file.read()
         with open(file_path, "wb") as f:
-            f.write(contents)
-            f.close()
+            shutil.copyfileobj(file.file, f)
 
         f = open(file_path, "rb")
-        if collection_name == None:
-            collection_name = calculate_sha256(f)[:63]
+        file_hash = calculate_sha256(f)
         f.close()
 
+        if collection_name == None:
+            collection_name = file_hash[:63]
+
         loader, known_type = get_loader(filename, file.content_type, file_path)
-        data = loader.load()
+        data = load_docs_with_cache(loader, file_path, file.content_type, file_hash)
 
         try:
             result = store_data_in_vector_db(data, collection_name)
@@ -1150,63 +1270,86 @@ def store_text(
         )
 
 
-@app.get("/scan")
-def scan_docs_dir(user=Depends(get_admin_user)):
-    for path in Path(DOCS_DIR).rglob("./**/*"):
-        try:
-            if path.is_file() and not path.name.startswith("."):
-                tags = extract_folders_after_data_docs(path)
-                filename = path.name
-                file_content_type = mimetypes.guess_type(path)
+def load_docs_dir_file(path: Path):
+    f = open(path, "rb")
+    file_hash = calculate_sha256(f)
+    f.close()
 
-                f = open(path, "rb")
-                collection_name = calculate_sha256(f)[:63]
-                f.close()
+    file_content_type = mimetypes.guess_type(path)
+    loader, known_type = get_loader(path.name, file_content_type[0], str(path))
+    data = load_docs_with_cache(loader, str(path), file_content_type[0], file_hash)
+    return file_hash[:63], data
 
-                loader, known_type = get_loader(
-                    filename, file_content_type[0], str(path)
-                )
-                data = loader.load()
 
-                try:
-                    result = store_data_in_vector_db(data, collection_name)
-
-                    if result:
-                        sanitized_filename = sanitize_filename(filename)
-                        doc = Documents.get_doc_by_name(sanitized_filename)
-
-                        if doc == None:
-                            doc = Documents.insert_new_doc(
-                                user.id,
-                                DocumentForm(
-                                    **{
-                                        "name": sanitized_filename,
-                                        "title": filename,
-                                        "collection_name": collection_name,
-                                        "filename": filename,
-                                        "content": (
-                                            json.dumps(
-                                                {
-                                                    "tags": list(
-                                                        map(
-                                                            lambda name: {"name": name},
-                                                            tags,
-                                                        )
-                                                    )
-                                                }
+def store_docs_dir_file(path: Path, future: Future, user):
+    try:
+        tags = extract_folders_after_data_docs(path)
+        filename = path.name
+        collection_name, data = future.result()
+
+        try:
+            result = store_data_in_vector_db(data, collection_name)
+
+            if result:
+                sanitized_filename = sanitize_filename(filename)
+                doc = Documents.get_doc_by_name(sanitized_filename)
+
+                if doc == None:
+                    doc = Documents.insert_new_doc(
+                        user.id,
+                        DocumentForm(
+                            **{
+                                "name": sanitized_filename,
+                                "title": filename,
+                                "collection_name": collection_name,
+                                "filename": filename,
+                                "content": (
+                                    json.dumps(
+                                        {
+                                            "tags": list(
+                                                map(
+                                                    lambda name: {"name": name},
+                                                    tags,
+                                                )
                                             )
-                                            if len(tags)
-                                            else "{}"
-                                        ),
-                                    }
+                                        }
+                                    )
+                                    if len(tags)
+                                    else "{}"
                                 ),
-                            )
-                except Exception as e:
-                    log.exception(e)
-                    pass
-
+                            }
+                        ),
+                    )
         except Exception as e:
             log.exception(e)
+            pass
+
+    except Exception as e:
+        log.exception(e)
+
+
+@app.get("/scan")
+def scan_docs_dir(user=Depends(get_admin_user)):
+    max_workers = RAG_LOAD_MAX_WORKERS or min(32, (os.cpu_count() or 1) + 4)
+
+    # Loading is mostly I/O bound, so files are parsed concurrently while the
+    # results are embedded and stored one at a time in directory order. At most
+    # max_workers files are loaded ahead of the store loop to bound memory use.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+
+        for path in Path(DOCS_DIR).rglob("./**/*"):
+            try:
+                if path.is_file() and not path.name.startswith("."):
+                    pending.append((path, executor.submit(load_docs_dir_file, path)))
+            except Exception as e:
+                log.exception(e)
+
+            if len(pending) >= max_workers:
+                store_docs_dir_file(*pending.popleft(), user)
+
+        while pending:
+            store_docs_dir_file(*pending.popleft(), user)
 
     return True
 
@@ -1216,6 +1359,17 @@ def reset_vector_db(user=Depends(get_admin_user)):
     CHROMA_CLIENT.reset()
 
 
+def reset_document_cache():
+    for entry in Path(RAG_DOCUMENT_CACHE_DIR).iterdir():
+        try:
+            if entry.is_file() or entry.is_symlink():
+                entry.unlink()
+            elif entry.is_dir():
+                shutil.rmtree(entry)
+        except Exception as e:
+            log.error("Failed to delete %s. Reason: %s" % (entry, e))
+
+
 @app.get("/reset/uploads")
 def reset_upload_dir(user=Depends(get_admin_user)) -> bool:
     folder = f"{UPLOAD_DIR}"
@@ -1237,6 +1391,7 @@ def reset_upload_dir(user=Depends(get_admin_user)) -> bool:
     except Exception as e:
         print(f"Failed to process the directory {folder}. Reason: {e}")
 
+    reset_document_cache()
     return True
 
 
@@ -1253,6 +1408,8 @@ def reset(user=Depends(get_admin_user)) -> bool:
         except Exception as e:
             log.error("Failed to delete %s. Reason: %s" % (file_path, e))
 
+    reset_document_cache()
+
     try:
         CHROMA_CLIENT.reset()
     except Exception as e:
@@ -1264,6 +1421,22 @@ def reset(user=Depends(get_admin_user)) -> bool:
 class SafeWebBaseLoader(WebBaseLoader):
     """WebBaseLoader with enhanced error handling for URLs."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_encoding = self.encoding
+        self.session.hooks["response"].append(self.use_declared_encoding)
+
+    def use_declared_encoding(self, response, *args, **kwargs):
+        """Use the charset from the Content-Type header when the server declares one.
+
+        _scrape only falls back to response.apparent_encoding, which runs charset
+        detection over the whole body, when self.encoding is None.
+        """
+        if self.default_encoding is None:
+            content_type = response.headers.get("Content-Type", "").lower()
+            self.encoding = response.encoding if "charset=" in content_type else None
+        return response
+
     def lazy_load(self) -> Iterator[Document]:
         """Lazy load text from the url(s) in web_path with error handling."""
         for path in self.web_paths:
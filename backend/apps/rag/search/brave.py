@@ -1,8 +1,7 @@
 import logging
+import orjson
 
-import requests
-
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -24,10 +23,10 @@ def search_brave(api_key: str, query: str, count: int) -> list[SearchResult]:
     }
     params = {"q": query, "count": count}
 
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params)
     response.raise_for_status()
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
     results = json_response.get("web", {}).get("results", [])
     return [
         SearchResult(
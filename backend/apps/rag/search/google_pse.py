@@ -1,9 +1,8 @@
 import json
 import logging
+import orjson
 
-import requests
-
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -30,10 +29,10 @@ def search_google_pse(
         "num": count,
     }
 
-    response = requests.request("GET", url, headers=headers, params=params)
+    response = session.request("GET", url, headers=headers, params=params)
     response.raise_for_status()
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
     results = json_response.get("items", [])
     return [
         SearchResult(
@@ -1,9 +1,44 @@
 from typing import Optional
 
+import requests
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 
 class SearchResult(BaseModel):
     link: str
-    title: Optional[str]
-    snippet: Optional[str]
+    title: Optional[str] = None
+    snippet: Optional[str] = None
+
+
+def get_http_adapter() -> HTTPAdapter:
+    """Create a pooled adapter that retries transient failures with exponential backoff.
+
+    Connection errors and 429/5xx responses are retried for every method, as the
+    search APIs are queried with idempotent POSTs too. Retry-After headers are
+    ignored so a server cannot stall a worker for an arbitrary time. Once retries
+    run out the last response is returned, so raise_for_status() still reports it.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    return HTTPAdapter(pool_maxsize=32, max_retries=retry)
+
+
+def get_session() -> requests.Session:
+    """Create a requests session that pools connections per search API host."""
+    session = requests.Session()
+    adapter = get_http_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by all search engines so repeated queries reuse TCP/TLS connections
+session = get_session()
@@ -1,9 +1,9 @@
 import logging
-import requests
+import orjson
 
 from typing import List
 
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -61,7 +61,7 @@ def search_searxng(
 
     log.debug(f"searching {query_url}")
 
-    response = requests.get(
+    response = session.get(
         query_url,
         headers={
             "User-Agent": "Open WebUI (https://github.com/open-webui/open-webui) RAG Bot",
@@ -75,7 +75,7 @@ def search_searxng(
 
     response.raise_for_status()  # Raise an exception for HTTP errors.
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
     results = json_response.get("results", [])
     sorted_results = sorted(results, key=lambda x: x.get("score", 0), reverse=True)
     return [
@@ -1,9 +1,8 @@
 import json
 import logging
+import orjson
 
-import requests
-
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -22,10 +21,10 @@ def search_serper(api_key: str, query: str, count: int) -> list[SearchResult]:
     payload = json.dumps({"q": query})
     headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
 
-    response = requests.request("POST", url, headers=headers, data=payload)
+    response = session.request("POST", url, headers=headers, data=payload)
     response.raise_for_status()
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
     results = sorted(
         json_response.get("organic", []), key=lambda x: x.get("position", 0)
     )
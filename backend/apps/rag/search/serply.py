@@ -1,10 +1,10 @@
 import json
 import logging
+import orjson
 
-import requests
 from urllib.parse import urlencode
 
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -48,10 +48,10 @@ def search_serply(
         "X-Proxy-Location": proxy_location,
     }
 
-    response = requests.request("GET", url, headers=headers)
+    response = session.request("GET", url, headers=headers)
     response.raise_for_status()
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
     log.info(f"results from serply search: {json_response}")
 
     results = sorted(
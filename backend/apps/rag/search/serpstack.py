@@ -1,9 +1,8 @@
 import json
 import logging
+import orjson
 
-import requests
-
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -28,10 +27,10 @@ def search_serpstack(
         "query": query,
     }
 
-    response = requests.request("POST", url, headers=headers, params=params)
+    response = session.request("POST", url, headers=headers, params=params)
     response.raise_for_status()
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
     results = sorted(
         json_response.get("organic_results", []), key=lambda x: x.get("position", 0)
     )
@@ -1,8 +1,7 @@
 import logging
+import orjson
 
-import requests
-
-from apps.rag.search.main import SearchResult
+from apps.rag.search.main import SearchResult, session
 from config import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -22,10 +21,10 @@ def search_tavily(api_key: str, query: str, count: int) -> list[SearchResult]:
     url = "https://api.tavily.com/search"
     data = {"query": query, "api_key": api_key}
 
-    response = requests.post(url, json=data)
+    response = session.post(url, json=data)
     response.raise_for_status()
 
-    json_response = response.json()
+    json_response = orjson.loads(response.content)
 
     raw_search_results = json_response.get("results", [])
 
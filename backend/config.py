@@ -796,6 +796,18 @@ RAG_EMBEDDING_OPENAI_BATCH_SIZE = PersistentConfig(
     os.environ.get("RAG_EMBEDDING_OPENAI_BATCH_SIZE", 1),
 )
 
+RAG_LOAD_MAX_WORKERS = os.environ.get("RAG_LOAD_MAX_WORKERS", "")
+RAG_LOAD_MAX_WORKERS = int(RAG_LOAD_MAX_WORKERS) if RAG_LOAD_MAX_WORKERS else None
+
+# Parsed documents are pickled here, outside CACHE_DIR which is served publicly
+RAG_DOCUMENT_CACHE_DIR = os.getenv(
+    "RAG_DOCUMENT_CACHE_DIR", f"{DATA_DIR}/rag/document_cache"
+)
+Path(RAG_DOCUMENT_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+RAG_DOCUMENT_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RAG_DOCUMENT_CACHE_MAX_ENTRIES", "256")
+)
+
 RAG_RERANKING_MODEL = PersistentConfig(
     "RAG_RERANKING_MODEL",
     "rag.reranking_model",